@@ -0,0 +1,122 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import math
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import simpleaudio as sa
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 44100
+
+
+def tone(
+    frequency: float,
+    duration: float,
+    volume: float = 0.3,
+    sample_rate: int = SAMPLE_RATE,
+) -> bytes:
+    """A sine tone as 16-bit mono PCM, faded in and out over 5 ms to avoid
+    clicks. Built with NumPy when available, otherwise with `array`."""
+    n = int(duration * sample_rate)
+    fade = min(int(0.005 * sample_rate), n // 2)
+    amplitude = volume * 32767
+
+    if np is not None:
+        samples = np.sin(2 * np.pi * frequency / sample_rate * np.arange(n))
+        envelope = np.ones(n)
+        if fade:
+            envelope[:fade] = np.linspace(0, 1, fade)
+            envelope[n - fade :] = np.linspace(1, 0, fade)
+        return (samples * envelope * amplitude).astype("<i2").tobytes()
+
+    step = 2 * math.pi * frequency / sample_rate
+    buf = array("h", bytes(2 * n))
+    for i in range(n):
+        envelope = min(1.0, i / fade, (n - i) / fade) if fade else 1.0
+        buf[i] = int(amplitude * envelope * math.sin(step * i))
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def chime(
+    frequencies: Sequence[float] = (784.0, 988.0, 1319.0),
+    duration: float = 0.18,
+    volume: float = 0.3,
+    sample_rate: int = SAMPLE_RATE,
+) -> bytes:
+    """Consecutive tones, used as the end-of-time signal."""
+    return b"".join(tone(f, duration, volume, sample_rate) for f in frequencies)
+
+
+class AudioBank(object):
+    """Wave files of a directory, decoded once and played from memory.
+
+    At most `max_voices` sounds overlap; starting one more stops the oldest
+    voice still playing.
+    """
+
+    def __init__(self, wav_dir: Path, max_voices: int = 2, preload: bool = False):
+        self.wav_dir = wav_dir
+        self.max_voices = max_voices
+        self.waves: Dict[str, sa.WaveObject] = {}
+        self.voices: List[sa.PlayObject] = []
+        self.lock = threading.Lock()
+
+        if preload:
+            for wav_file in sorted(wav_dir.glob("*.wav")):
+                self.load(wav_file.stem)
+
+    def load(self, name: str) -> sa.WaveObject:
+        wave_obj = self.waves.get(name)
+        if wave_obj is None:
+            wave_obj = sa.WaveObject.from_wave_file(str(self.wav_dir / f"{name}.wav"))
+            self.waves[name] = wave_obj
+        return wave_obj
+
+    def add(self, name: str, audio_data: bytes, sample_rate: int = SAMPLE_RATE):
+        """Register 16-bit mono PCM data under `name`."""
+        self.waves[name] = sa.WaveObject(audio_data, 1, 2, sample_rate)
+
+    def add_tones(
+        self,
+        count: int = 11,
+        low: float = 660.0,
+        high: float = 1320.0,
+        duration: float = 0.12,
+    ):
+        """Synthesize `warning0` ... `warning{count - 1}`, a ramp rising from
+        `low` to `high` Hz, and the end-of-time `chime`."""
+        for i in range(count):
+            frequency = low * (high / low) ** (i / max(count - 1, 1))
+            self.add(f"warning{i}", tone(frequency, duration))
+        self.add("chime", chime())
+
+    def play(self, name: str) -> Optional[sa.PlayObject]:
+        wave_obj = self.load(name)
+        with self.lock:
+            self.voices = [v for v in self.voices if v.is_playing()]
+            while self.voices and len(self.voices) >= self.max_voices:
+                self.voices.pop(0).stop()
+
+            if self.max_voices <= 0:
+                return None
+
+            play_obj = wave_obj.play()
+            self.voices.append(play_obj)
+            return play_obj
+
+    def stop(self):
+        with self.lock:
+            for voice in self.voices:
+                voice.stop()
+            self.voices.clear()
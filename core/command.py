@@ -0,0 +1,92 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import time
+from collections import deque
+from tkinter import TclError
+from typing import Callable, Dict, Optional, Tuple
+
+from tick import LatencyRecorder
+
+
+class CommandQueue(object):
+    """Marshal commands from listener threads onto the Tk thread.
+
+    `push` may be called from any thread; it only appends to a `deque` and,
+    for the first command of a batch, wakes the Tk thread with a virtual
+    event (or, with `interval`, the Tk thread polls instead). The Tk thread
+    drains the whole batch at once; of the commands sharing a `group`, only
+    the last one in the batch runs.
+
+    If the wakeup cannot be sent (Tk raises RuntimeError when a thread
+    pushes before `mainloop` has started), the next push tries again, and
+    an idle drain queued here picks up whatever arrived before `mainloop`.
+    """
+
+    def __init__(
+        self,
+        window,
+        interval: Optional[int] = None,
+        latency: Optional[LatencyRecorder] = None,
+    ):
+        self.window = window
+        self.interval = interval
+        self.latency = latency
+        self.commands = deque()
+        self.handlers: Dict[str, Tuple[Callable, Optional[str]]] = {}
+        self.pending = False
+        self.max_depth = 0
+        self.coalesced = 0
+
+        if interval is None:
+            window.bind("<<Command>>", self.drain)
+            window.after_idle(self.drain)
+        else:
+            window.after(interval, self.drain)
+
+    def register(self, name: str, handler: Callable, group: Optional[str] = None):
+        self.handlers[name] = (handler, group)
+
+    def push(self, name: str, *args):
+        self.commands.append((name, args, time.perf_counter()))
+        if self.interval is None and not self.pending:
+            self.pending = True
+            try:
+                self.window.event_generate("<<Command>>", when="tail")
+            except (RuntimeError, TclError):
+                self.pending = False
+
+    def depth(self) -> int:
+        return len(self.commands)
+
+    def drain(self, event=None):
+        self.pending = False
+        depth = len(self.commands)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+        batch = [self.commands.popleft() for _ in range(depth)]
+        last = {}
+        for i, (name, _, _) in enumerate(batch):
+            group = self.handlers[name][1]
+            if group is not None:
+                last[group] = i
+
+        for i, (name, args, pushed) in enumerate(batch):
+            handler, group = self.handlers[name]
+            if group is not None and last[group] != i:
+                self.coalesced += 1
+                continue
+
+            handler(*args)
+            if self.latency is not None:
+                self.latency.add(time.perf_counter() - pushed)
+
+        if self.interval is not None:
+            self.window.after(self.interval, self.drain)
+
+    def report(self) -> str:
+        report = f"commands: max_depth={self.max_depth}, coalesced={self.coalesced}"
+        if self.latency is not None:
+            report += f"\n{self.latency.report()}"
+        return report
@@ -0,0 +1,171 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import math
+import time
+from typing import Callable, Optional
+
+READY = "ready"
+START = "start"
+PAUSE = "pause"
+
+
+class TimerEngine(object):
+    """Tk-free timing state of one countdown or count-up session.
+
+    The engine never schedules anything itself: a frontend calls
+    `start`, `pause` and `reset`, and asks `tick` what to display for a
+    given second. Time is read from the injectable `clock`.
+
+    With an `end` target (a `wall_clock` time) the session counts down to
+    that moment instead of for `total` seconds. Both clocks are anchored on
+    start so `resync` can notice a suspend or a clock jump.
+    """
+
+    __slots__ = (
+        "clock",
+        "wall_clock",
+        "total",
+        "countdown",
+        "end",
+        "state",
+        "anchor",
+        "wall_anchor",
+        "offset",
+    )
+
+    def __init__(
+        self,
+        total: int = 300,
+        countdown: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.total = total
+        self.countdown = countdown
+        self.end = None
+        self.state = READY
+        self.anchor = 0.0
+        self.wall_anchor = 0.0
+        self.offset = 0.0
+
+    def target(self, end: Optional[float]):
+        """Count down to the wall-clock time `end`, or for `total` seconds
+        again with None."""
+        self.end = end
+        if end is not None:
+            self.countdown = True
+
+    def start(self, now: Optional[float] = None):
+        """Start or resume, at `now` if the caller already read the clock."""
+        if self.state != START:
+            self.anchor = self.clock() if now is None else now
+            self.wall_anchor = self.wall_clock() - (self.clock() - self.anchor)
+            self.state = START
+
+            if self.end is not None:
+                # align the second boundaries with the wall-clock target
+                remain = max(self.end - self.wall_anchor, 0.0)
+                self.total = math.ceil(remain)
+                self.offset = self.total - remain
+
+    def resync(self, threshold: float = 1.0) -> float:
+        """Compare how far both clocks moved since the start. When they
+        disagree by `threshold` seconds or more (a suspend, or the wall
+        clock was set), re-anchor in one step and return the difference;
+        a session with an `end` target jumps to the right remaining time."""
+        if self.state != START:
+            return 0.0
+
+        drift = (self.wall_clock() - self.wall_anchor) - (self.clock() - self.anchor)
+        if abs(drift) < threshold:
+            return 0.0
+
+        if self.end is not None:
+            self.state = PAUSE
+            self.start()
+        else:
+            self.wall_anchor += drift
+        return drift
+
+    def pause(self, now: Optional[float] = None):
+        if self.state == START:
+            self.offset += (self.clock() if now is None else now) - self.anchor
+            self.state = PAUSE
+
+    def reset(self, total: Optional[int] = None, countdown: Optional[bool] = None):
+        if total is not None:
+            self.total = total
+        if countdown is not None:
+            self.countdown = countdown
+        self.state = READY
+        self.offset = 0.0
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        if self.state == START:
+            return self.offset + (self.clock() if now is None else now) - self.anchor
+        return self.offset
+
+    def index(self) -> int:
+        """The whole second the session is currently in."""
+        return int(self.elapsed())
+
+    def tick(self, index: Optional[int] = None) -> int:
+        """Seconds to display for the `index`th second (the current one by
+        default), or -1 once the session is over."""
+        if index is None:
+            index = self.index()
+        if index > self.total:
+            return -1
+        return self.total - index if self.countdown else index
+
+    def alert(self, index: Optional[int] = None) -> Optional[bool]:
+        """None outside the last ten seconds, otherwise whether the
+        `index`th second is a highlighted one."""
+        if index is None:
+            index = self.index()
+        count_down = self.total - index - 1
+        if count_down < 10:
+            return bool(count_down % 2)
+        return None
+
+
+class PrecisionStopwatch(object):
+    """Count-up stopwatch measured in integer nanoseconds.
+
+    Timestamps passed to `start`, `pause` and `elapsed_ns` come from the
+    same `clock`, so a lap or a stop keeps the time of the key press no
+    matter when the display catches up.
+    """
+
+    __slots__ = ("clock", "state", "anchor", "offset")
+
+    def __init__(self, clock: Callable[[], int] = time.perf_counter_ns):
+        self.clock = clock
+        self.state = READY
+        self.anchor = 0
+        self.offset = 0
+
+    def start(self, now: Optional[int] = None):
+        if self.state != START:
+            self.anchor = self.clock() if now is None else now
+            self.state = START
+
+    def pause(self, now: Optional[int] = None):
+        if self.state == START:
+            self.offset += (self.clock() if now is None else now) - self.anchor
+            self.state = PAUSE
+
+    def reset(self):
+        self.state = READY
+        self.offset = 0
+
+    def elapsed_ns(self, now: Optional[int] = None) -> int:
+        if self.state == START:
+            return self.offset + (self.clock() if now is None else now) - self.anchor
+        return self.offset
+
+    def elapsed(self) -> float:
+        return self.elapsed_ns() / 1e9
@@ -0,0 +1,20 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import itertools
+from pathlib import Path
+from typing import IO, Tuple
+
+
+def open_new(output_dir: Path, name: str, suffix: str, **kwargs) -> Tuple[Path, IO]:
+    """Create and open "{name}{suffix}" in `output_dir` for writing. If it
+    exists, " (2)", " (3)", ... is added to the name instead of
+    overwriting it."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for n in itertools.count(1):
+        label = name if n == 1 else f"{name} ({n})"
+        out_file = output_dir / f"{label}{suffix}"
+        try:
+            return out_file, open(out_file, "x", **kwargs)
+        except FileExistsError:
+            continue
@@ -5,6 +5,7 @@ import contextlib
 import functools
 import itertools
 import webbrowser
+from concurrent.futures import Future
 from threading import Thread
 from tkinter import TclError, Widget
 from typing import Callable, List, Optional, Tuple, Union
@@ -17,6 +18,9 @@ from ttkbootstrap.icons import Icon
 from ttkbootstrap.localization import MessageCatalog
 from ttkbootstrap.scrolled import ScrolledFrame
 
+from pool import BLOCK, WorkerPool
+from spans import traced
+
 
 class CenterMessageDialog(MessageDialog):
     """A simple modal dialog class that can be used to build simple
@@ -647,16 +651,23 @@ class CustomWindow(Window):
                 _font[k] = v
 
     @staticmethod
-    def multi_thread(thread_name: Optional[str] = None):
+    def multi_thread(
+        thread_name: Optional[str] = None,
+        size: int = 1,
+        queue_size: int = 0,
+        policy: str = BLOCK,
+    ):
+        """Run the decorated function on a `WorkerPool` of its own and
+        return a `Future`. The pool is available as `wrapper.pool`."""
+
         def decorator(func):
+            pool = WorkerPool(thread_name or func.__name__, size, queue_size, policy)
+
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
-                thread = Thread(target=func, args=args, kwargs=kwargs)
-                thread.name = thread_name or wrapper.__name__
-                thread.daemon = True
-                thread.start()
-                return thread
+                return pool.submit(func, *args, **kwargs)
 
+            wrapper.pool = pool
             return wrapper
 
         return decorator
@@ -717,6 +728,7 @@ class CustomWindow(Window):
         self.grid_widget(widgets_list, self, self.base_size)
 
     @staticmethod
+    @traced()
     def grid_widget(
         widgets_list: List[List[Union[Widget, str, int]]],
         master: Union[Window, Toplevel],
@@ -941,13 +953,18 @@ class CustomWindow(Window):
 
     def wait_work_done(
         self,
-        thread: Thread,
+        thread: Union[Thread, Future],
         interval: int = 100,
         callback: Optional[Callable] = None,
         *args,
         **kwargs,
     ):
-        if thread.is_alive():
+        if isinstance(thread, Future):
+            is_alive = not thread.done()
+        else:
+            is_alive = thread.is_alive()
+
+        if is_alive:
             self.after(
                 interval,
                 lambda: self.wait_work_done(
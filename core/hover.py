@@ -0,0 +1,146 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class HoverDetector(object):
+    """Tell whether the pointer is over a window from a cached rectangle.
+
+    `move` only compares numbers; the rectangle is refreshed by whoever
+    knows it changed (a `<Configure>` handler). `on_enter` and `on_leave`
+    run only when the pointer crosses the border. Once inside, the pointer
+    has to get more than `margin` pixels away to count as outside again,
+    and a transition closer than `debounce` seconds to the previous one is
+    held back: `defer(delay, settle)` is asked to call `settle` once the
+    interval is over, which applies wherever the pointer was last seen.
+    Without `defer` the held transition waits for the next `move`.
+    """
+
+    def __init__(
+        self,
+        on_enter: Callable[[], None],
+        on_leave: Callable[[], None],
+        margin: int = 0,
+        debounce: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        defer: Optional[Callable[[float, Callable[[], None]], None]] = None,
+    ):
+        self.on_enter = on_enter
+        self.on_leave = on_leave
+        self.margin = margin
+        self.debounce = debounce
+        self.clock = clock
+        self.defer = defer
+
+        self.x0 = self.y0 = self.x1 = self.y1 = 0
+        self.inside: Optional[bool] = None
+        self.changed_at = float("-inf")
+        self.pending: Optional[bool] = None
+        self.deferred = False
+
+    def update_rect(self, x: int, y: int, width: int, height: int):
+        self.x0, self.y0 = x, y
+        self.x1, self.y1 = x + width, y + height
+
+    def contains(self, x: int, y: int) -> bool:
+        margin = self.margin if self.inside else 0
+        return (
+            self.x0 - margin <= x <= self.x1 + margin
+            and self.y0 - margin <= y <= self.y1 + margin
+        )
+
+    def distance(self, x: int, y: int) -> int:
+        """Pixels between the pointer and the rectangle, 0 inside it."""
+        return max(self.x0 - x, x - self.x1, self.y0 - y, y - self.y1, 0)
+
+    def move(self, x: int, y: int):
+        inside = self.contains(x, y)
+        if inside == self.inside:
+            self.pending = None
+            return
+
+        if self.debounce:
+            wait = self.debounce - (self.clock() - self.changed_at)
+            if wait > 0:
+                self.pending = inside
+                if self.defer is not None and not self.deferred:
+                    self.deferred = True
+                    self.defer(wait, self.settle)
+                return
+
+        self._change(inside)
+
+    def settle(self):
+        """Apply the transition held back by the debounce, if the pointer
+        has not come back since."""
+        self.deferred = False
+        pending, self.pending = self.pending, None
+        if pending is not None and pending != self.inside:
+            self._change(pending)
+
+    def _change(self, inside: bool):
+        self.pending = None
+        self.changed_at = self.clock()
+        self.inside = inside
+        if inside:
+            self.on_enter()
+        else:
+            self.on_leave()
+
+
+def defer_on_thread(delay: float, func: Callable[[], None]):
+    """`HoverDetector.defer` for listener threads: run `func` on a timer
+    thread, for callbacks that are safe to call from any thread."""
+    timer = threading.Timer(delay, func)
+    timer.daemon = True
+    timer.start()
+
+
+class PointerPoller(object):
+    """Feed a `HoverDetector` from Tk instead of a global mouse hook.
+
+    `<Enter>`/`<Leave>` on the window trigger an immediate check, and
+    between events the pointer is polled with `winfo_pointerxy`. The poll
+    interval grows with the distance to the window: a pointer `d` pixels
+    away moving at most `speed` pixels per ms cannot arrive before `d /
+    speed` ms, clamped to `min_interval`...`max_interval`.
+    """
+
+    def __init__(
+        self,
+        window,
+        detector: HoverDetector,
+        min_interval: int = 50,
+        max_interval: int = 1000,
+        speed: float = 2.0,
+    ):
+        self.window = window
+        self.detector = detector
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speed = speed
+        self.after_id = None
+        self.polls = 0
+
+    def start(self):
+        self.window.bind("<Enter>", self.poll, add="+")
+        self.window.bind("<Leave>", self.poll, add="+")
+        self.poll()
+
+    def stop(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+
+    def poll(self, event=None):
+        self.stop()
+        self.polls += 1
+        x, y = self.window.winfo_pointerxy()
+        self.detector.move(x, y)
+
+        interval = int(self.detector.distance(x, y) / self.speed)
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        self.after_id = self.window.after(interval, self.poll)
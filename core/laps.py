@@ -0,0 +1,65 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import csv
+import json
+import time
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from export import open_new
+
+
+class LapRecorder(object):
+    """Splits of one session kept in two `array('q')` buffers: the elapsed
+    time of each split and the wall-clock time it was taken, both in
+    nanoseconds (16 bytes per split)."""
+
+    def __init__(self):
+        self.splits = array("q")
+        self.stamps = array("q")
+
+    def __len__(self) -> int:
+        return len(self.splits)
+
+    def add(self, split_ns: int, stamp_ns: Optional[int] = None):
+        self.splits.append(split_ns)
+        self.stamps.append(time.time_ns() if stamp_ns is None else stamp_ns)
+
+    def clear(self):
+        self.splits = array("q")
+        self.stamps = array("q")
+
+    def rows(self) -> Iterator[Tuple[int, int, int, str]]:
+        """Yield `(lap, split_ns, lap_ns, time)` one split at a time."""
+        previous = 0
+        for i, (split, stamp) in enumerate(zip(self.splits, self.stamps), 1):
+            seconds, ns = divmod(stamp, 1_000_000_000)
+            stamp_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+            yield i, split, split - previous, f"{stamp_str}.{ns // 1_000_000:03d}"
+            previous = split
+
+    def export(self, output_dir: Path, fmt: str = "csv") -> Path:
+        """Write the splits to a new csv or jsonl file in `output_dir`,
+        row by row, and return its path."""
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"unsupported format: {fmt}")
+
+        name = time.strftime("laps %Y-%m-%d %H%M%S")
+        fields = ("lap", "split_ns", "lap_ns", "time")
+        out_file, fp = open_new(
+            output_dir, name, f".{fmt}", encoding="utf-8", newline=""
+        )
+
+        with fp:
+            if fmt == "csv":
+                writer = csv.writer(fp)
+                writer.writerow(fields)
+                for row in self.rows():
+                    writer.writerow(row)
+            else:
+                for row in self.rows():
+                    fp.write(json.dumps(dict(zip(fields, row))) + "\n")
+
+        return out_file
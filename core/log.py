@@ -1,75 +1,376 @@
 #!/usr/bin/env/python3
 # -*- coding:utf-8 -*-
 
+import atexit
+import gzip
 import logging
-from logging.handlers import RotatingFileHandler
+import lzma
+import os
+import queue
+import re
+import shutil
+import threading
+from contextlib import suppress
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+from pool import COALESCE, WorkerPool
+
+LEVELS = (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR,
+          logging.CRITICAL)
+
+SPLIT = 'split'
+SINGLE = 'single'
+
+RECORD_START = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} (\w+)>>')
+
+COMPRESSORS = {'gz': gzip.open, 'xz': lzma.open}
+
+compressor = WorkerPool('log-compress', policy=COALESCE)
+files_lock = threading.Lock()
+listeners_lock = threading.Lock()
+
+
+def open_log(path: Path):
+    """Open a log file or a compressed backup as text."""
+    opener = COMPRESSORS.get(path.suffix[1:], open)
+    return opener(path, 'rt', encoding='utf-8')
+
+
+def lower_priority():
+    """Make the calling thread yield the CPU to the rest of the app, where
+    the platform allows it per thread."""
+    with suppress(AttributeError, OSError):
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+
+
+def trim(log_dir: Path, disk_budget: int):
+    """Delete the oldest backups until the files in `log_dir` fit in
+    `disk_budget` bytes. The files being written to are never deleted."""
+    sizes, backups = {}, []
+    for path in log_dir.iterdir():
+        with suppress(OSError):
+            stat = path.stat()
+            if path.is_file():
+                sizes[path] = stat.st_size
+                if '.log.' in path.name and not path.name.endswith('.part'):
+                    backups.append((stat.st_mtime, path))
+
+    total = sum(sizes.values())
+    for _, path in sorted(backups):
+        if total <= disk_budget:
+            break
+        # a backup still open for compressing cannot go on Windows
+        with files_lock, suppress(OSError):
+            path.unlink()
+            total -= sizes[path]
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Rotate by renaming only; a low-priority background worker then
+    compresses the ".1" ... ".N" backups with `compress` ("gz" or "xz")
+    and trims `log_dir` to `disk_budget` bytes.
+
+    The worker first renames a backup to a private name and compresses
+    that, so a rollover never renames a file the worker has open (which
+    fails on Windows). Rollovers meanwhile shift the hole it left, and
+    `rollovers` tells the worker where the result belongs.
+    """
+
+    def __init__(self, filename, compress='gz', disk_budget=None, **kwargs):
+        if compress is not None and compress not in COMPRESSORS:
+            raise ValueError(f'unknown compression: {compress}')
+
+        super().__init__(filename, **kwargs)
+        self.compress = compress
+        self.disk_budget = disk_budget
+        self.rollovers = 0
+        self.recover()
+        # backups left over from the last run
+        compressor.submit(self.compress_backups)
+
+    def recover(self):
+        """Put backups a crash left in the middle of compressing back in
+        line: partial output is dropped, and a private copy goes to the
+        first free slot from where it was taken, to be compressed again."""
+        base = Path(self.baseFilename)
+        with files_lock:
+            for part in base.parent.glob(f'{base.name}.*.part'):
+                with suppress(FileNotFoundError):
+                    part.unlink()
+
+            leftovers = []
+            for path in base.parent.glob(f'{base.name}.*.compressing'):
+                i = path.name[len(base.name) + 1:-len('.compressing')]
+                if i.isdigit():
+                    leftovers.append((int(i), path))
+
+            for i, path in sorted(leftovers):
+                for slot in range(i, self.backupCount + 1):
+                    taken = os.path.exists(self.backup(slot)) or (
+                        self.compress and
+                        os.path.exists(self.backup(slot, True)))
+                    if not taken:
+                        os.replace(path, self.backup(slot))
+                        break
+                else:
+                    path.unlink()
+
+    def backup(self, i: int, compressed: bool = False) -> str:
+        name = f'{self.baseFilename}.{i}'
+        return f'{name}.{self.compress}' if compressed else name
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if self.backupCount > 0:
+            with files_lock:
+                for compressed in (False, True):
+                    with suppress(FileNotFoundError):
+                        os.remove(self.backup(self.backupCount, compressed))
+
+                for i in range(self.backupCount - 1, 0, -1):
+                    for compressed in (False, True):
+                        with suppress(FileNotFoundError):
+                            os.replace(self.backup(i, compressed),
+                                       self.backup(i + 1, compressed))
+
+                with suppress(FileNotFoundError):
+                    os.replace(self.baseFilename, self.backup(1))
+                self.rollovers += 1
+
+            compressor.submit(self.compress_backups)
+
+        if not self.delay:
+            self.stream = self._open()
+
+    def compress_backups(self):
+        lower_priority()
+        for i in range(1, self.backupCount + 1):
+            if self.compress is None:
+                break
+
+            source = f'{self.backup(i)}.compressing'
+            with files_lock:
+                try:
+                    os.replace(self.backup(i), source)
+                except FileNotFoundError:
+                    continue
+                rollovers = self.rollovers
+
+            stat = os.stat(source)
+            part = f'{self.backup(i, True)}.part'
+            with open(source, 'rb') as src, \
+                    COMPRESSORS[self.compress](part, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.utime(part, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            with files_lock:
+                # the rollovers since have shifted the backup further on
+                slot = i + self.rollovers - rollovers
+                if slot <= self.backupCount:
+                    os.replace(part, self.backup(slot, True))
+                else:
+                    os.remove(part)
+                os.remove(source)
+
+        if self.disk_budget is not None:
+            trim(Path(self.baseFilename).parent, self.disk_budget)
+
+
+class LevelFilter(logging.Filter):
+    """Pass only records of exactly one level."""
+
+    def __init__(self, level: int):
+        super().__init__()
+        self.level = level
+
+    def filter(self, record):
+        return record.levelno == self.level
+
 
 class Logger(object):
+    """One file per level ("INFO.log", or "{log_file_name} - INFO.log")
+    plus the console at `show_level` and above.
+
+    With `routing=SINGLE` all levels go to one rotating file ("ALL.log",
+    or "{log_file_name}.log") instead: one descriptor and one write per
+    record rather than up to five files with their own backups. `query`
+    gives the same per-level view in both modes.
+
+    With `compress` ("gz" or "xz") or `disk_budget` (bytes for the whole
+    of `log_dir`), rollovers only rename; compressing the backups and
+    deleting the oldest ones run on a background worker.
+
+    The handlers are built once per file set and shared by every Logger
+    writing to it; opening a file set again with other settings raises
+    ValueError. Calls only put the record on a queue; a QueueListener
+    thread does the formatting and the file I/O, so the Tk thread never
+    waits on the disk. The files are opened on their first record.
+    """
+
+    _listeners = {}
 
     def __init__(self,
                  log_dir: Path,
                  log_file_name: str = None,
                  show_level=logging.INFO,
                  maxBytes=5 * 1024 * 1024,
-                 backupCount=5):
+                 backupCount=5,
+                 routing=SPLIT,
+                 compress=None,
+                 disk_budget=None):
 
         self.log_dir = log_dir
         self.log_file_name = log_file_name
         self.show_level = show_level
         self.maxBytes = maxBytes
         self.backupCount = backupCount
+        self.routing = routing
+        self.compress = compress
+        self.disk_budget = disk_budget
         self.formatter = logging.Formatter(
             fmt='%(asctime)s %(levelname)s>>%(message)s',
             datefmt='%Y-%m-%d %H:%M:%S')
         self.filehandlers = {}
         self.steamhandler = None
 
-    def __create_handler(self, log_level: int):
-        if log_level not in self.filehandlers.keys():
-            if self.log_file_name:
-                log_file = self.log_dir / f'{self.log_file_name} - {logging.getLevelName(log_level)}.log'
+        name = f'{log_dir / (log_file_name or "")}:{routing}'
+        self.logger = logging.getLogger(f'stopwatch:{name}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+        settings = (show_level, maxBytes, backupCount, compress, disk_budget)
+        with listeners_lock:
+            if name in self._listeners:
+                self.listener, opened = self._listeners[name]
+                if settings != opened:
+                    raise ValueError(
+                        f'{name} is already open with other settings: {opened}')
+                self.filehandlers = {
+                    handler.level: handler
+                    for handler in self.listener.handlers
+                    if isinstance(handler, RotatingFileHandler)
+                }
+                self.steamhandler = self.listener.handlers[-1]
             else:
-                log_file = self.log_dir / f'{logging.getLevelName(log_level)}.log'
+                self.listener = self.__create_listener()
+                self._listeners[name] = (self.listener, settings)
+
+    def log_file(self, log_level: int = None) -> Path:
+        """The file that records of `log_level` are written to."""
+        if self.routing == SINGLE:
+            if self.log_file_name:
+                return self.log_dir / f'{self.log_file_name}.log'
+            return self.log_dir / 'ALL.log'
+
+        if self.log_file_name:
+            return self.log_dir / f'{self.log_file_name} - {logging.getLevelName(log_level)}.log'
+        return self.log_dir / f'{logging.getLevelName(log_level)}.log'
 
+    def __create_handler(self, log_level: int):
+        log_file = self.log_file(log_level)
+        if self.compress or self.disk_budget is not None:
+            filehandler = CompressingRotatingFileHandler(
+                log_file,
+                compress=self.compress,
+                disk_budget=self.disk_budget,
+                encoding='utf-8',
+                maxBytes=self.maxBytes,
+                backupCount=self.backupCount,
+                delay=True)
+        else:
             filehandler = RotatingFileHandler(log_file,
                                               encoding='utf-8',
                                               maxBytes=self.maxBytes,
-                                              backupCount=self.backupCount)
+                                              backupCount=self.backupCount,
+                                              delay=True)
+
+        filehandler.setFormatter(self.formatter)
+        filehandler.setLevel(log_level)
+        if self.routing == SPLIT:
+            filehandler.addFilter(LevelFilter(log_level))
+        return filehandler
+
+    def __create_listener(self):
+        if self.routing == SINGLE:
+            self.filehandlers[logging.DEBUG] = self.__create_handler(
+                logging.DEBUG)
+        else:
+            for log_level in LEVELS:
+                self.filehandlers[log_level] = self.__create_handler(
+                    log_level)
+
+        steamhandler = logging.StreamHandler()
+        steamhandler.setFormatter(self.formatter)
+        steamhandler.setLevel(self.show_level)
+        self.steamhandler = steamhandler
 
-            filehandler.setFormatter(self.formatter)
-            filehandler.setLevel(log_level)
-            self.filehandlers[log_level] = filehandler
+        records = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandler(records))
+        listener = QueueListener(records,
+                                 *self.filehandlers.values(),
+                                 self.steamhandler,
+                                 respect_handler_level=True)
+        listener.start()
+        atexit.register(self.__stop_listener, listener)
+        return listener
 
-        if not self.steamhandler:
-            steamhandler = logging.StreamHandler()
-            steamhandler.setFormatter(self.formatter)
-            steamhandler.setLevel(self.show_level)
-            self.steamhandler = steamhandler
+    @staticmethod
+    def __stop_listener(listener: QueueListener):
+        with listeners_lock:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
 
-    def __log(self, flag, message):
-        logger = logging.getLogger(flag)
-        log_level = logging._nameToLevel[flag.upper()]
-        logger.setLevel(log_level)
+    def flush(self):
+        """Block until every record logged so far is written."""
+        with listeners_lock:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.flush()
+            self.listener.start()
 
-        self.__create_handler(log_level)
-        logger.addHandler(self.filehandlers[log_level])
-        logger.addHandler(self.steamhandler)
+    def query(self, log_level: int):
+        """Yield the records of exactly `log_level`, oldest first, from the
+        backups and the current file. Multi-line records are kept whole."""
+        self.flush()
+        name = logging.getLevelName(log_level)
+        log_file = self.log_file(log_level)
+        backups = [
+            log_file.with_name(f'{log_file.name}.{i}{suffix}')
+            for i in range(self.backupCount, 0, -1)
+            for suffix in ('', '.gz', '.xz')
+        ]
 
-        logger.log(log_level, message)
+        for path in backups + [log_file]:
+            if not path.exists():
+                continue
+            with open_log(path) as fp:
+                record, keep = [], False
+                for line in fp:
+                    match = RECORD_START.match(line)
+                    if match:
+                        if keep:
+                            yield ''.join(record).rstrip('\n')
+                        record, keep = [], match.group(1) == name
+                    record.append(line)
+                if keep:
+                    yield ''.join(record).rstrip('\n')
 
     def debug(self, message):
-        self.__log('debug', message)
+        self.logger.debug(message)
 
     def info(self, message):
-        self.__log('info', message)
+        self.logger.info(message)
 
     def warning(self, message):
-        self.__log('warning', message)
+        self.logger.warning(message)
 
     def error(self, message):
-        self.__log('error', message)
+        self.logger.error(message)
 
     def critical(self, message):
-        self.__log('critical', message)
+        self.logger.critical(message)
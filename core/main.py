@@ -5,15 +5,34 @@
 # CreateDate: 2022-01-26 23:20:06
 # Description: 计时器
 
+import argparse
+import math
 import platform
 import time
 from tkinter import Widget
 from typing import List, Union
 
-import simpleaudio as sa
+from audio import AudioBank
+from command import CommandQueue
 from dirs import *
+from engine import READY, START, PrecisionStopwatch, TimerEngine
 from gui import CustomWindow
+from hover import HoverDetector, PointerPoller, defer_on_thread
+from laps import LapRecorder
 from pynput import keyboard, mouse
+from render import RenderCache, format_ns
+from ring import (
+    TRACE_CUE,
+    TRACE_PAUSE,
+    TRACE_RESET,
+    TRACE_RESYNC,
+    TRACE_START,
+    TRACE_TICK,
+    TickRing,
+)
+from spans import traced, tracer
+from tick import LatencyRecorder, TickScheduler
+from watchdog import Watchdog
 from ttkbootstrap import *
 from ttkbootstrap.constants import *
 
@@ -38,7 +57,35 @@ class App(CustomWindow):
         transient=None,
         overrideredirect=False,
         alpha=1,
+        tones=False,
+        audio_lead=0.0,
+        measure_audio=False,
+        hover_mode="hook",
+        hover_margin=0,
+        hover_debounce=0.0,
+        measure_input=False,
+        precision=0,
+        fps=30,
+        laps_format="csv",
+        end_at=None,
+        clock=None,
+        scheduler=None,
+        watchdog=None,
+        trace_ticks=False,
+        trace=False,
     ):
+        """`clock` (seconds, e.g. a `VirtualClock`) and `scheduler` (an
+        object with `after`/`after_cancel`, e.g. a `VirtualScheduler`)
+        replace the real clocks and Tk's `after` on the timing path, so a
+        whole session can run in virtual time. `watchdog` is the stall
+        threshold in ms, None leaves the watchdog off. `trace_ticks` keeps
+        the history of every tick in the ring file log/ticks.ring. `trace`
+        records spans of the hot paths from the start, F8 toggles it."""
+        if trace:
+            tracer.start()
+        self.tones = tones
+        self.precision = precision
+        self.end_at = end_at
         super().__init__(
             title,
             version,
@@ -59,8 +106,48 @@ class App(CustomWindow):
 
         self.top_center()
         self.wm_attributes("-topmost", True)
+        self.time_text_var.set = traced("time_text_var.set")(self.time_text_var.set)
 
-        self.bind_mouse()
+        self.auto_hide_widgets = self.winfo_children()[1:]
+        self.overlay_var = StringVar()
+        self.overlay_label = Label(
+            self, textvariable=self.overlay_var, anchor=CENTER, bootstyle=SECONDARY
+        )
+        self.overlay_shown = False
+        self.commands = CommandQueue(
+            self, latency=LatencyRecorder("input-to-action") if measure_input else None
+        )
+        self.commands.register("start", self.start)
+        self.commands.register("reset", self._reset, group="reset")
+        self.commands.register("lap", self.lap)
+        self.commands.register("quit", self.quit, group="quit")
+        self.commands.register("trace", self.toggle_trace)
+        self.commands.register("show", self.show_controls, group="hover")
+        self.commands.register("hide", self.hide_controls, group="hover")
+
+        if hover_mode == "tk":
+            self.hover_detector = HoverDetector(
+                self.show_controls,
+                self.hide_controls,
+                margin=hover_margin,
+                debounce=hover_debounce,
+                defer=lambda delay, func: self.after(math.ceil(delay * 1000), func),
+            )
+        else:
+            self.hover_detector = HoverDetector(
+                lambda: self.commands.push("show"),
+                lambda: self.commands.push("hide"),
+                margin=hover_margin,
+                debounce=hover_debounce,
+                defer=defer_on_thread,
+            )
+        self.on_configure()
+        self.bind("<Configure>", self.on_configure)
+        if hover_mode == "tk":
+            self.pointer_poller = PointerPoller(self, self.hover_detector)
+            self.pointer_poller.start()
+        else:
+            self.bind_mouse()
         self.bind_key()
         self.time_text_label.bind("<ButtonPress-1>", self.start_move)
         self.time_text_label.bind("<ButtonRelease-1>", self.stop_move)
@@ -68,9 +155,57 @@ class App(CustomWindow):
         self.bind("<Escape>", lambda e: self.quit())
         package_list = ["Nuitka", "simpleaudio", "pynput", "ttkbootstrap"]
         self.bind("<F1>", lambda e: self.show_about(package_list, layout_base=self))
-
-        self.after(100, self.update_state)
-        self.signal = "ready"
+        self.bind("<F9>", self.toggle_overlay)
+
+        self.audio_bank = AudioBank(res_dir, preload=not tones)
+        if tones:
+            self.audio_bank.add_tones()
+        self.render_cache = RenderCache()
+        self.laps = LapRecorder()
+        self.laps_format = laps_format
+        self.scheduler = self if scheduler is None else scheduler
+        self.finish_id = None
+        if precision:
+            if clock is None:
+                self.engine = PrecisionStopwatch()
+            else:
+                self.engine = PrecisionStopwatch(lambda: int(clock() * 1_000_000_000))
+            self.tick_scheduler = TickScheduler(
+                self.scheduler.after,
+                self.scheduler.after_cancel,
+                self._frame,
+                period=1 / fps,
+                clock=clock or time.monotonic,
+                calibrate=True,
+            )
+        else:
+            if clock is None:
+                self.engine = TimerEngine()
+            else:
+                self.engine = TimerEngine(clock=clock, wall_clock=clock)
+            self.tick_scheduler = TickScheduler(
+                self.scheduler.after,
+                self.scheduler.after_cancel,
+                self._start,
+                clock=self.engine.clock,
+                cue=self._cue,
+                cue_lead=audio_lead,
+                calibrate=True,
+            )
+        if measure_audio:
+            self.audio_offsets = LatencyRecorder("tick-to-audio")
+            self.flip_offsets = LatencyRecorder("tick-to-flip")
+        else:
+            self.audio_offsets = self.flip_offsets = None
+        self.tick_ring = TickRing(log_dir / "ticks.ring") if trace_ticks else None
+        self.watchdog = None
+        if watchdog is not None:
+            self.watchdog = Watchdog(self, log_dir, threshold=watchdog)
+            self.watchdog.start()
+        self.shown_state = None
+        self.time_number_var.trace_add("write", self.on_setting_changed)
+        self.count_down_var.trace_add("write", self.on_setting_changed)
+        self.update_state()
 
     def add_widget(self):
         self.time_text_var = StringVar()
@@ -86,7 +221,7 @@ class App(CustomWindow):
             self,
             textvariable=self.time_text_var,
             font=f'"{font.nametofont("TkDefaultFont")["family"]}" {int(3.5 * self.base_size)} bold',
-            width=self.base_size,
+            width=self.base_size + (self.precision + 1 if self.precision else 0),
             anchor=CENTER,
         )
 
@@ -127,16 +262,23 @@ class App(CustomWindow):
         self.geometry(f"+{pos_x}+{pos_y}")
         self.deiconify()
 
+    def show_controls(self):
+        self.show_widget(self.auto_hide_widgets)
+
+    def hide_controls(self):
+        self.hide_widget(self.auto_hide_widgets)
+
+    def on_configure(self, event=None):
+        if event is None or event.widget is self:
+            self.hover_detector.update_rect(
+                self.winfo_x(), self.winfo_y(), self.winfo_width(), self.winfo_height()
+            )
+
     @CustomWindow.multi_thread()
     def bind_mouse(self):
+        @traced()
         def on_move(x, y):
-            if (
-                self.winfo_x() <= x <= self.winfo_x() + self.winfo_width()
-                and self.winfo_y() <= y <= self.winfo_y() + self.winfo_height()
-            ):
-                self.show_widget(self.winfo_children()[1:])
-            else:
-                self.hide_widget(self.winfo_children()[1:])
+            self.hover_detector.move(x, y)
 
         def on_click(x, y, button, is_press):
             pass
@@ -158,13 +300,18 @@ class App(CustomWindow):
                 if key == keyboard.Key.alt:
                     start_time = time.time()
                 if key == keyboard.Key.f4 and time.time() - start_time < 0.5:
-                    self.quit()
+                    self.commands.push("quit")
 
+        @traced()
         def on_release(key):
             if key == keyboard.Key.f5:
-                self.start()
+                self.commands.push("start", self.engine.clock())
             if key == keyboard.Key.f6:
-                self._reset()
+                self.commands.push("reset")
+            if key == keyboard.Key.f7:
+                self.commands.push("lap", self.engine.clock(), time.time_ns())
+            if key == keyboard.Key.f8:
+                self.commands.push("trace")
 
         with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
             listener.join()
@@ -198,116 +345,377 @@ class App(CustomWindow):
         y = min(y, int(s_height - w_height - utility.scale_size(self, 50)))
         self.geometry(f"+{x}+{y}")
 
-    @CustomWindow.multi_thread()
+    def on_setting_changed(self, *args):
+        if self.engine.state == READY:
+            self.show_ready()
+
+    def show_ready(self):
+        if self.precision:
+            self.time_text_var.set(format_ns(0, self.precision))
+            self.engine.reset()
+            return
+
+        if self.end_at is not None:
+            self.time_text_var.set(self.end_at)
+            self.render_cache.forget()
+            self.engine.reset(countdown=True)
+            self.engine.target(next_end_at(self.end_at, self.engine.wall_clock()))
+            return
+
+        minutes = self.time_number_var.get()
+        self.render_text(minutes * 60)
+        self.engine.reset(minutes * 60, self.count_down_var.get())
+
+    def render_text(self, seconds: int):
+        text = self.render_cache.update_text(seconds)
+        if text is not None:
+            self.time_text_var.set(text)
+
+    def render_style(self, style: str):
+        if self.render_cache.update_style(style):
+            self.time_text_label.config(bootstyle=style)
+
+    @traced()
     def update_state(self):
+        """Sync the widgets with the engine state, touching them only when
+        the state actually changed since the last call."""
+        state = self.engine.state
+        if state == self.shown_state:
+            return
+
         widget_list = [
             self.time_number_scale,
             self.count_down_checkbutton,
             self.play_sound_checkbutton,
         ]
-        if self.signal == "ready":
-            minutes = self.time_number_var.get()
-            self.time_text_var.set(f"{str(minutes).zfill(2)}:00")
-            self.total_count = self.time_number_var.get() * 60
-            self.start_count = 0
+        if state == READY:
+            self.show_ready()
             self.enable_widget(widget_list)
             self.exit_button.config(
                 text="Exit[ESC]", command=self.quit, width=7, bootstyle=DANGER
             )
-        else:
+        elif self.shown_state in (None, READY):
             self.disable_widget(widget_list)
             self.exit_button.config(
                 text="Reset[F6]", command=self._reset, width=7, bootstyle=SUCCESS
             )
 
-        self.after(100, self.update_state)
+        self.shown_state = state
 
-    def start(self):
-        if self.signal == "start":
-            self.signal = "pause"
+    def start(self, at=None):
+        """Toggle start/pause. `at` is the engine clock reading taken when
+        the hotkey was pressed, so the queue latency is not counted."""
+        if self.engine.state == START:
             self.start_button.config(text="Start[F5]", bootstyle=(DEFAULT, OUTLINE))
-            self._pause()
+            self._pause(at)
         else:
-            self.signal = "start"
             self.start_button.config(text="Pause[F5]", bootstyle=(WARNING, OUTLINE))
-            self._start()
+            resumed = self.engine.state != READY
+            if not resumed and self.end_at is not None:
+                # the target set on entering READY may have passed since
+                self.engine.target(next_end_at(self.end_at, self.engine.wall_clock()))
+            self.engine.start(at)
+            if not resumed and not self.precision:
+                self.render_cache.reserve(self.engine.total + 1)
+            self.trace(TRACE_START)
+            self.tick_scheduler.start(self.engine.elapsed(), immediate=not resumed)
+
+        self.update_state()
+
+    @traced()
+    def beep(self, count_down: int):
+        if self.tones:
+            self.audio_bank.play(f"warning{min(max(9 - count_down, 0), 10)}")
+        else:
+            self.audio_bank.play("second")
+
+    def _cue(self, tick: int):
+        """Start the sound of the `tick`th second, called by the tick
+        scheduler ahead of the redraw."""
+        if not self.play_sound_var.get():
+            return
+
+        if self.engine.tick(tick) < 0:
+            if not self.tones:
+                return
+            self.audio_bank.play("chime")
+        elif self.engine.alert(tick) is not None:
+            self.beep(self.engine.total - tick - 1)
+        else:
+            return
 
-    @staticmethod
-    @CustomWindow.multi_thread()
-    def beep():
-        wave_path = str(res_dir / "second.wav")
-        wave_obj = sa.WaveObject.from_wave_file(wave_path)
-        play_obj = wave_obj.play()
-        play_obj.wait_done()
-
-    def _start(self):
-        if self.count_down_var.get():
-            if self.total_count >= 0:
-                self._countdown()
-            else:
-                self.after(2000, self._reset)
+        if self.audio_offsets is not None:
+            self.audio_offsets.add(
+                self.tick_scheduler.clock() - self.tick_scheduler.deadline(tick)
+            )
+        if self.tick_ring is not None:
+            self.trace(TRACE_CUE, tick)
+
+    @traced()
+    def _start(self, tick: int):
+        """Render the `tick`th second, counted from the monotonic anchor of
+        the tick scheduler."""
+        if self.tick_ring is not None:
+            self.trace(TRACE_TICK, tick)
+
+        if self.engine.resync():
+            # suspended or the clock was set, render the right second now
+            self.trace(TRACE_RESYNC, tick)
+            self.tick_scheduler.start(self.engine.elapsed())
+            return
+
+        seconds = self.engine.tick(tick)
+        if seconds < 0:
+            self.tick_scheduler.cancel()
+            self.finish_id = self.scheduler.after(2000, self._reset)
+            return
+
+        self.render_text(seconds)
+
+        alert = self.engine.alert(tick)
+        if alert is not None:
+            self.render_style(DANGER if alert else DEFAULT)
+
+            if self.flip_offsets is not None and self.play_sound_var.get():
+                self.flip_offsets.add(
+                    self.tick_scheduler.clock() - self.tick_scheduler.deadline(tick)
+                )
+
+        if self.overlay_shown:
+            self.update_overlay()
+
+    @traced()
+    def _frame(self, frame: int):
+        """Render the precision stopwatch. The text comes from the engine
+        clock, not from the frame index, and frames Tk could not keep up
+        with are skipped by the scheduler."""
+        if self.tick_ring is not None:
+            self.trace(TRACE_TICK, frame)
+        self.render_elapsed()
+
+    def render_elapsed(self):
+        self.time_text_var.set(format_ns(self.engine.elapsed_ns(), self.precision))
+        if self.overlay_shown:
+            self.update_overlay()
+
+    def toggle_overlay(self, event=None):
+        """Show or hide the debug overlay with the tick calibration."""
+        self.overlay_shown = not self.overlay_shown
+        if self.overlay_shown:
+            self.update_overlay()
+            self.overlay_label.grid(
+                row=len(self.widgets_list), column=0, columnspan=2, sticky=NSEW
+            )
+        else:
+            self.overlay_label.grid_remove()
+
+    def update_overlay(self):
+        scheduler = self.tick_scheduler
+        self.overlay_var.set(
+            f"lead {scheduler.lead * 1000:.1f}ms  "
+            f"late {scheduler.last_error * 1000:.1f}/"
+            f"{scheduler.mean_error * 1000:.1f}/{scheduler.max_error * 1000:.1f}ms"
+        )
 
-        elif self.start_count <= self.total_count:
-            self._count()
+    def lap(self, at=None, stamp_ns=None):
+        """Record a split at `at`, the engine clock reading of the hotkey,
+        stamped with `stamp_ns`, the wall clock read along with it."""
+        if self.engine.state != START:
+            return
+
+        if self.precision:
+            self.laps.add(self.engine.elapsed_ns(at), stamp_ns)
         else:
-            self.after(2000, self._reset)
-
-    def _countdown(self):
-        mm = self.total_count // 60
-        ss = self.total_count - mm * 60
-        self.total_count -= 1
-        self.time_text_var.set(f"{mm:02d}:{ss:02d}")
-
-        count_down = self.total_count
-        if count_down < 10:
-            if count_down % 2:
-                self.time_text_label.config(bootstyle=DANGER)
-            else:
-                self.time_text_label.config(bootstyle=DEFAULT)
+            self.laps.add(int(self.engine.elapsed(at) * 1_000_000_000), stamp_ns)
 
-            if self.play_sound_var.get():
-                self.beep()
+    def export_laps(self):
+        if len(self.laps):
+            self.laps.export(output_dir, self.laps_format)
+            self.laps.clear()
 
-        self.after_id = self.after(1000, self._start)
+    def toggle_trace(self):
+        """Start recording spans, or stop and export them to output/."""
+        if tracer.enabled:
+            tracer.stop(output_dir)
+        else:
+            tracer.start()
+
+    def trace(self, event: int, tick: int = None):
+        """Append `event` to the tick ring, with the lateness of `tick`
+        against its deadline."""
+        if self.tick_ring is None:
+            return
+        if tick is None:
+            lateness, tick = 0.0, -1
+        else:
+            scheduler = self.tick_scheduler
+            lateness = scheduler.clock() - scheduler.deadline(tick)
+        self.tick_ring.write(event, lateness, tick, self.engine.state)
 
-    def _count(self):
-        mm = self.start_count // 60
-        ss = self.start_count - mm * 60
-        self.start_count += 1
-        self.time_text_var.set(f"{mm:02d}:{ss:02d}")
+    def _pause(self, at=None):
+        self.tick_scheduler.cancel()
+        self.engine.pause(at)
+        self.trace(TRACE_PAUSE)
+        if self.precision:
+            self.render_elapsed()
 
-        count_down = self.total_count - self.start_count
-        if count_down < 10:
-            if count_down % 2:
-                self.time_text_label.config(bootstyle=DANGER)
-            else:
-                self.time_text_label.config(bootstyle=DEFAULT)
+    def _reset(self):
+        self.tick_scheduler.cancel()
+        if self.finish_id is not None:
+            self.scheduler.after_cancel(self.finish_id)
+            self.finish_id = None
+        self.engine.reset()
+        self.trace(TRACE_RESET)
+        self.export_laps()
+        self.render_style(DEFAULT)
+        self.start_button.config(text="Start[F5]", bootstyle=DEFAULT)
+        self.update_state()
 
-            if self.play_sound_var.get():
-                self.beep()
 
-        self.after_id = self.after(1000, self._start)
+def positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {value!r}") from e
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {number}")
+    return number
 
-    def _pause(self):
-        self.after_cancel(self.after_id)
 
-    def _reset(self):
-        self.after_cancel(self.after_id)
-        self.signal = "ready"
-        self.time_text_label.config(bootstyle=DEFAULT)
-        self.start_button.config(text="Start[F5]", bootstyle=DEFAULT)
+def parse_end_at(value: str) -> str:
+    """Check and normalize "HH:MM"."""
+    try:
+        end = time.strptime(value, "%H:%M")
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"expected HH:MM, got {value!r}") from e
+    return time.strftime("%H:%M", end)
+
+
+def next_end_at(value: str, now: float) -> float:
+    """The next wall-clock time after `now` matching "HH:MM", as a
+    timestamp."""
+    end = time.strptime(value, "%H:%M")
+    for days in (0, 1):
+        day = time.localtime(now + days * 24 * 60 * 60)
+        end_at = time.mktime(day[:3] + (end.tm_hour, end.tm_min, 0, 0, 0, -1))
+        if end_at > now:
+            return end_at
+    return end_at
 
 
 def main():
+    parser = argparse.ArgumentParser(prog="StopWatch")
+    parser.add_argument(
+        "--tones",
+        action="store_true",
+        help="synthesize the warning sounds instead of playing res/second.wav",
+    )
+    parser.add_argument(
+        "--audio-lead",
+        type=float,
+        default=0.0,
+        metavar="MS",
+        help="start warning sounds this many milliseconds before the tick",
+    )
+    parser.add_argument(
+        "--measure-audio",
+        action="store_true",
+        help="print the tick-to-audio and tick-to-flip offsets on exit",
+    )
+    parser.add_argument(
+        "--hover",
+        choices=("hook", "tk"),
+        default="hook",
+        help="detect hovering with a global mouse hook or with Tk events and polling",
+    )
+    parser.add_argument(
+        "--measure-input",
+        action="store_true",
+        help="print the command queue depth and input-to-action latency on exit",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        choices=(0, 2, 3),
+        default=0,
+        help="run a stopwatch with 2 (centisecond) or 3 (millisecond) decimals",
+    )
+    parser.add_argument(
+        "--fps",
+        type=positive_int,
+        default=30,
+        help="display refresh rate of --precision",
+    )
+    parser.add_argument(
+        "--laps-format",
+        choices=("csv", "jsonl"),
+        default="csv",
+        help="file format the F7 splits are exported in on reset and exit",
+    )
+    parser.add_argument(
+        "--end-at",
+        type=parse_end_at,
+        metavar="HH:MM",
+        help="count down to a wall-clock time instead of a number of minutes",
+    )
+    parser.add_argument(
+        "--watchdog",
+        type=positive_int,
+        metavar="MS",
+        help="log the stacks of all threads to log/ when the mainloop stalls this long",
+    )
+    parser.add_argument(
+        "--trace-ticks",
+        action="store_true",
+        help="keep every tick in log/ticks.ring, decode it with core/ring.py",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="record spans of the hot paths to output/ for Perfetto, F8 toggles",
+    )
+    args, _ = parser.parse_known_args()
+    if args.precision and args.end_at is not None:
+        parser.error("--end-at counts down, it cannot be combined with --precision")
+
     if platform.system() == "Windows":
         iconphoto = res_dir / "main_32.png"
     else:
         iconphoto = res_dir / "main_256.png"
 
     app = App(
-        title="StopWatch", version="0.1.0", iconphoto=iconphoto, overrideredirect=True
+        title="StopWatch",
+        version="0.1.0",
+        iconphoto=iconphoto,
+        overrideredirect=True,
+        tones=args.tones,
+        audio_lead=args.audio_lead / 1000,
+        measure_audio=args.measure_audio,
+        hover_mode=args.hover,
+        measure_input=args.measure_input,
+        precision=args.precision,
+        fps=args.fps,
+        laps_format=args.laps_format,
+        end_at=args.end_at,
+        watchdog=args.watchdog,
+        trace_ticks=args.trace_ticks,
+        trace=args.trace,
     )
     app.mainloop()
+    # the heartbeat ended with the mainloop, the exit work is no stall
+    if app.watchdog is not None:
+        app.watchdog.stop()
+    app.export_laps()
+    if app.tick_ring is not None:
+        app.tick_ring.close()
+    if tracer.enabled:
+        tracer.stop(output_dir)
+
+    if args.measure_audio:
+        print(app.audio_offsets.report())
+        print(app.flip_offsets.report())
+    if args.measure_input:
+        print(app.commands.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import heapq
+import itertools
+import math
+import time
+import traceback
+from typing import Callable, List, Optional, Tuple
+
+
+class ManagedTimer(object):
+    """A timer of a `TimerManager`, periodic unless `period` is None."""
+
+    __slots__ = ("callback", "period", "anchor", "tick", "deadline", "owner", "active")
+
+    def __init__(
+        self,
+        callback: Callable[[int], None],
+        period: Optional[float],
+        anchor: float,
+        deadline: float,
+        owner=None,
+    ):
+        self.callback = callback
+        self.period = period
+        self.anchor = anchor
+        self.tick = 0
+        self.deadline = deadline
+        self.owner = owner
+        self.active = True
+
+
+class TimerManager(object):
+    """Any number of timers behind a single Tk `after`.
+
+    Timers live in a min-heap keyed by their next deadline; only the
+    earliest one is armed, and every timer that is due when it fires runs
+    in the same batch. Periodic timers keep their deadlines on multiples
+    of `period` from their anchor and skip ticks they were too late for,
+    like `TickScheduler`. Cancelling is O(1): the heap entry is dropped
+    when it surfaces, and the heap is rebuilt once most of it is dead.
+
+    The manager only needs `after`/`after_cancel`, so every window of an
+    application can share the one created for the root window, passing
+    itself as `owner` to cancel its timers with `cancel_owner` on destroy.
+    """
+
+    def __init__(
+        self,
+        after: Callable,
+        after_cancel: Callable,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.after = after
+        self.after_cancel = after_cancel
+        self.clock = clock
+
+        self.heap: List[Tuple[float, int, ManagedTimer]] = []
+        self.counter = itertools.count()
+        self.after_id = None
+        self.armed_at = math.inf
+        self.dead = 0
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self.heap) - self.dead
+
+    def add(
+        self,
+        callback: Callable[[int], None],
+        delay: float,
+        period: Optional[float] = None,
+        owner=None,
+    ) -> ManagedTimer:
+        """Call `callback(tick)` after `delay` seconds, and every `period`
+        seconds after that if `period` is given."""
+        now = self.clock()
+        anchor = now + delay
+        timer = ManagedTimer(callback, period, anchor, anchor, owner)
+        self._push(timer)
+        if anchor < self.armed_at:
+            self._arm()
+        return timer
+
+    def cancel(self, timer: ManagedTimer):
+        if timer.active:
+            timer.active = False
+            self.dead += 1
+            if self.dead > 64 and self.dead * 2 > len(self.heap):
+                self.heap = [e for e in self.heap if e[2].active]
+                heapq.heapify(self.heap)
+                self.dead = 0
+
+    def cancel_owner(self, owner):
+        for _, _, timer in self.heap:
+            if timer.owner is owner:
+                self.cancel(timer)
+
+    def cancel_all(self):
+        for _, _, timer in self.heap:
+            timer.active = False
+        self.heap.clear()
+        self.dead = 0
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        self.armed_at = math.inf
+
+    def _push(self, timer: ManagedTimer):
+        heapq.heappush(self.heap, (timer.deadline, next(self.counter), timer))
+
+    def _arm(self):
+        heap = self.heap
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+            self.dead -= 1
+
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
+        if not heap:
+            self.armed_at = math.inf
+            return
+
+        self.armed_at = heap[0][0]
+        delay = math.ceil((self.armed_at - self.clock()) * 1000)
+        self.after_id = self.after(max(delay, 0), self._fire)
+
+    def _fire(self):
+        self.after_id = None
+        self.armed_at = math.inf
+        now = self.clock()
+
+        # callbacks may cancel timers, which can replace self.heap
+        while self.heap and self.heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self.heap)
+            if not timer.active:
+                self.dead -= 1
+                continue
+
+            if timer.period is None:
+                tick = 0
+                timer.active = False
+            else:
+                tick = int((now - timer.anchor) // timer.period)
+                timer.tick = tick
+                timer.deadline = timer.anchor + (tick + 1) * timer.period
+                self._push(timer)
+
+            self.fired += 1
+            # one failing callback must not stall the others, or the rest
+            # of the batch and every later timer would never be armed
+            try:
+                timer.callback(tick)
+            except Exception:
+                traceback.print_exc()
+
+        self._arm()
@@ -0,0 +1,111 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+BLOCK = "block"
+DROP = "drop"
+COALESCE = "coalesce"
+
+
+class WorkerPool(object):
+    """A bounded pool of named daemon worker threads.
+
+    `queue_size` limits the tasks waiting for a worker (0 means unbounded).
+    When the queue is full, `policy` decides what `submit` does:
+
+    - "block": wait for a free slot.
+    - "drop": reject the task, its future is returned cancelled.
+    - "coalesce": like "drop", and in addition a call of a function that
+      is still waiting in the queue is folded into the waiting call and
+      gets its future.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int = 1,
+        queue_size: int = 0,
+        policy: str = BLOCK,
+    ):
+        if policy not in (BLOCK, DROP, COALESCE):
+            raise ValueError(f"unknown policy: {policy}")
+
+        self.name = name
+        self.size = size
+        self.policy = policy
+        self.tasks = queue.Queue(queue_size)
+        self.lock = threading.Lock()
+        self.threads = []
+        self.waiting: Dict[Callable, Future] = {}
+
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        with self.lock:
+            if self.policy == COALESCE and func in self.waiting:
+                return self.waiting[func]
+
+            if len(self.threads) < self.size:
+                thread = threading.Thread(
+                    target=self._work, name=f"{self.name}-{len(self.threads)}"
+                )
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+
+            future = Future()
+            task = (future, func, args, kwargs)
+            try:
+                self.tasks.put_nowait(task)
+            except queue.Full:
+                if self.policy != BLOCK:
+                    self.rejected += 1
+                    future.cancel()
+                    return future
+            else:
+                self.queued += 1
+                if self.policy == COALESCE:
+                    self.waiting[func] = future
+                return future
+
+            self.queued += 1
+
+        self.tasks.put(task)
+        return future
+
+    def _work(self):
+        while True:
+            future, func, args, kwargs = self.tasks.get()
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+                if self.waiting.get(func) is future:
+                    del self.waiting[func]
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as e:
+                    traceback.print_exc()
+                    future.set_exception(e)
+
+            with self.lock:
+                self.running -= 1
+                self.completed += 1
@@ -0,0 +1,75 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import sys
+from typing import Optional
+
+
+def format_seconds(seconds: int) -> str:
+    """Format as "MM:SS", or "H:MM:SS" from one hour on."""
+    if seconds < 60 * 60:
+        mm, ss = divmod(seconds, 60)
+        return f"{mm:02d}:{ss:02d}"
+    hh, rest = divmod(seconds, 60 * 60)
+    mm, ss = divmod(rest, 60)
+    return f"{hh}:{mm:02d}:{ss:02d}"
+
+
+def format_ns(ns: int, digits: int = 2) -> str:
+    """Format as "MM:SS.ff" with `digits` digits of fractional seconds."""
+    seconds, rest = divmod(ns, 1_000_000_000)
+    mm, ss = divmod(seconds, 60)
+    return f"{mm:02d}:{ss:02d}.{rest // 10 ** (9 - digits):0{digits}d}"
+
+
+class RenderCache(object):
+    """Interned "MM:SS" (or "H:MM:SS") strings plus the text and style
+    last shown.
+
+    The table covers `0 ... size - 1` seconds, grows with `reserve` and is
+    filled lazily, so after the first pass a tick reuses the same string
+    objects and the `update_*` methods report a change only when the
+    visible text or style really differs.
+    """
+
+    __slots__ = ("table", "text", "style")
+
+    def __init__(self, size: int = 60 * 60 + 1):
+        self.table = [None] * size
+        self.text = None
+        self.style = None
+
+    def format(self, seconds: int) -> str:
+        if 0 <= seconds < len(self.table):
+            text = self.table[seconds]
+            if text is None:
+                text = self.table[seconds] = sys.intern(format_seconds(seconds))
+            return text
+
+        return format_seconds(seconds)
+
+    def reserve(self, size: int):
+        """Make the table cover `0 ... size - 1` seconds, e.g. a session
+        longer than an hour."""
+        if size > len(self.table):
+            self.table.extend([None] * (size - len(self.table)))
+
+    def update_text(self, seconds: int) -> Optional[str]:
+        """The text for `seconds` if it differs from the text shown."""
+        text = self.format(seconds)
+        if text == self.text:
+            return None
+        self.text = text
+        return text
+
+    def update_style(self, style: str) -> bool:
+        if style == self.style:
+            return False
+        self.style = style
+        return True
+
+    def forget(self):
+        """Drop what is known about the widgets, e.g. after they were
+        changed elsewhere."""
+        self.text = None
+        self.style = None
@@ -0,0 +1,111 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from export import open_new
+
+
+class Tracer(object):
+    """Collect spans of the hot paths as Chrome trace events, to be opened
+    in ui.perfetto.dev or chrome://tracing.
+
+    Spans are recorded only between `start` and `stop`; the oldest are
+    dropped beyond `max_events`.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], int] = time.perf_counter_ns,
+        max_events: int = 1_000_000,
+    ):
+        self.clock = clock
+        self.enabled = False
+        self.origin = 0
+        self.events = deque(maxlen=max_events)
+
+    def start(self):
+        self.events.clear()
+        self.origin = self.clock()
+        self.enabled = True
+
+    def stop(self, output_dir: Path) -> Optional[Path]:
+        """Stop recording and export what was recorded, if anything."""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        if not self.events:
+            return None
+        return self.export(output_dir)
+
+    def add(self, name: str, start: int, end: int):
+        self.events.append((name, threading.get_ident(), start, end))
+
+    def export(self, output_dir: Path) -> Path:
+        """Write the spans to a new trace JSON file in `output_dir` and
+        return its path."""
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        # a span in flight when recording stopped may still be added
+        spans = list(self.events)
+
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": names.get(tid, str(tid))},
+            }
+            for tid in {span[1] for span in spans}
+        ]
+        for name, tid, start, end in spans:
+            events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self.origin) / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                }
+            )
+
+        name = time.strftime("trace %Y-%m-%d %H%M%S")
+        out_file, fp = open_new(output_dir, name, ".json", encoding="utf-8")
+        with fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+        return out_file
+
+
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None):
+    """Record every call of the decorated function as a span while the
+    tracer is enabled. When it is not, the cost is one attribute check."""
+
+    def decorator(func):
+        span = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+
+            start = tracer.clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.add(span, start, tracer.clock())
+
+        return wrapper
+
+    return decorator
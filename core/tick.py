@@ -0,0 +1,379 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import heapq
+import itertools
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class TickScheduler(object):
+    """Fire `callback(tick)` on whole multiples of `period` measured from a
+    monotonic anchor.
+
+    Every deadline is computed from the anchor instead of from the previous
+    callback, so the latency of a single `after` never accumulates. The
+    lateness of each tick is kept in `last_error`, `max_error` and
+    `error_sum` (seconds).
+
+    An optional `cue(tick)` runs `cue_lead` seconds before each deadline,
+    ahead of the callback, for work that has to land on the boundary
+    itself such as starting a sound.
+
+    With `calibrate`, the lateness of every `after` callback is folded into
+    an EWMA (`lead`) and each wakeup is requested that much earlier. A
+    wakeup up to `tolerance` seconds before the deadline counts as on
+    time, anything earlier sleeps again for the remainder, so there is no
+    busy waiting.
+    """
+
+    def __init__(
+        self,
+        after: Callable,
+        after_cancel: Callable,
+        callback: Callable[[int], None],
+        period: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        cue: Optional[Callable[[int], None]] = None,
+        cue_lead: float = 0.0,
+        calibrate: bool = False,
+        alpha: float = 0.1,
+        max_lead: float = 0.05,
+        tolerance: float = 0.002,
+    ):
+        self.after = after
+        self.after_cancel = after_cancel
+        self.callback = callback
+        self.period = period
+        self.clock = clock
+        self.cue = cue
+        self.cue_lead = cue_lead
+        self.calibrate = calibrate
+        self.alpha = alpha
+        self.max_lead = max_lead
+        self.tolerance = tolerance if calibrate else 0.0
+
+        self.lead = 0.0
+        self.target = 0.0
+        self.anchor = 0.0
+        self.tick = -1
+        self.cued = False
+        self.after_id = None
+        self.running = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.last_error = 0.0
+        self.max_error = 0.0
+        self.error_sum = 0.0
+
+    @property
+    def mean_error(self) -> float:
+        return self.error_sum / self.ticks if self.ticks else 0.0
+
+    def deadline(self, tick: int) -> float:
+        return self.anchor + tick * self.period
+
+    def elapsed(self) -> float:
+        return self.clock() - self.anchor if self.running else 0.0
+
+    def start(self, offset: float = 0.0, immediate: bool = True):
+        """Start ticking as if `offset` seconds had already elapsed. With
+        `immediate` the tick that `offset` falls into fires at once,
+        otherwise the first callback lands on the next boundary."""
+        self.cancel()
+        self.anchor = self.clock() - offset
+        self.tick = int(offset // self.period)
+        self.cued = False
+        self.running = True
+        if immediate:
+            if self.cue is not None:
+                self.cue(self.tick)
+            self.callback(self.tick)
+        if self.running and self.after_id is None:
+            self._arm()
+
+    def stop(self) -> float:
+        """Stop ticking and return the elapsed time since the anchor."""
+        elapsed = self.elapsed()
+        self.cancel()
+        return elapsed
+
+    def cancel(self):
+        self.running = False
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _arm(self):
+        target = self.deadline(self.tick + 1) - self.lead
+        if self.cue is not None and not self.cued:
+            target -= self.cue_lead
+        self.target = target
+        delay = math.ceil((target - self.clock()) * 1000)
+        self.after_id = self.after(max(delay, 0), self._fire)
+
+    def _fire(self):
+        self.after_id = None
+        if not self.running:
+            return
+
+        if self.calibrate:
+            late = self.clock() - self.target
+            lead = self.lead + self.alpha * (late - self.lead)
+            self.lead = min(max(lead, 0.0), self.max_lead)
+
+        if self.cue is not None and not self.cued:
+            self.cued = True
+            self.cue(self.tick + 1)
+            if not self.running:
+                return
+            if self.clock() < self.deadline(self.tick + 1) - self.tolerance:
+                self._arm()
+                return
+
+        now = self.clock()
+        tick = int((now + self.tolerance - self.anchor) // self.period)
+        if tick <= self.tick:
+            # woke up before the deadline, wait for the remainder
+            self._arm()
+            return
+
+        error = now - (self.anchor + tick * self.period)
+        self.ticks += 1
+        self.last_error = error
+        self.error_sum += error
+        if error > self.max_error:
+            self.max_error = error
+
+        self.tick = tick
+        self.cued = False
+        self.callback(tick)
+
+        if self.running and self.after_id is None:
+            self._arm()
+
+
+class VirtualClock(object):
+    """A clock that only moves when told to."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class VirtualScheduler(object):
+    """`after`/`after_cancel` against a `VirtualClock`.
+
+    `run` fires the callbacks in deadline order and jumps the clock to each
+    deadline (plus `latency`) instead of waiting for it, so hours of timer
+    activity take milliseconds.
+    """
+
+    def __init__(self, clock: VirtualClock, latency: float = 0.0):
+        self.clock = clock
+        self.latency = latency
+        self.queue = []
+        self.cancelled = set()
+        self.counter = itertools.count()
+        self.fired = 0
+
+    def after(self, ms: int, func: Callable, *args) -> int:
+        after_id = next(self.counter)
+        deadline = self.clock.now + ms / 1000 + self.latency
+        heapq.heappush(self.queue, (deadline, after_id, func, args))
+        return after_id
+
+    def after_cancel(self, after_id: int):
+        self.cancelled.add(after_id)
+
+    def run(self, until: float = math.inf) -> int:
+        """Fire everything due up to the clock time `until`, or until
+        nothing is scheduled, and return how many callbacks ran."""
+        fired = 0
+        while self.queue and self.queue[0][0] <= until:
+            deadline, after_id, func, args = heapq.heappop(self.queue)
+            if after_id in self.cancelled:
+                self.cancelled.discard(after_id)
+                continue
+
+            self.clock.now = max(self.clock.now, deadline)
+            func(*args)
+            fired += 1
+
+        if until != math.inf:
+            self.clock.now = max(self.clock.now, until)
+        self.fired += fired
+        return fired
+
+
+class LatencyRecorder(object):
+    """Collect offsets in seconds and summarize them in milliseconds."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples: List[float] = []
+
+    def add(self, offset: float):
+        self.samples.append(offset)
+
+    def clear(self):
+        self.samples.clear()
+
+    def percentile(self, p: float) -> float:
+        samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[min(int(p / 100 * len(samples)), len(samples) - 1)]
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": 0}
+        return {
+            "count": len(self.samples),
+            "min": min(self.samples) * 1000,
+            "p50": self.percentile(50) * 1000,
+            "p90": self.percentile(90) * 1000,
+            "p99": self.percentile(99) * 1000,
+            "max": max(self.samples) * 1000,
+        }
+
+    def report(self) -> str:
+        items = ", ".join(
+            f"{k}={v:.2f}ms" if k != "count" else f"{k}={v}"
+            for k, v in self.summary().items()
+        )
+        return f"{self.name}: {items}"
+
+
+class WheelTimer(object):
+    __slots__ = ("expires", "callback", "level", "index", "active")
+
+    def __init__(self, expires: int, callback: Callable[[], None]):
+        self.expires = expires
+        self.callback = callback
+        self.level = 0
+        self.index = 0
+        self.active = True
+
+
+class TimingWheel(object):
+    """Hashed hierarchical timing wheel for large numbers of one-shot
+    reminders at absolute times of `clock`.
+
+    Level `l` has `slots` buckets of `slots ** l` ticks of `resolution`
+    seconds each. Insert and cancel are O(1). Timers move down a level when
+    their bucket comes round, and expire from level 0. Each level keeps a
+    bitmap of non-empty buckets, so `advance` jumps straight to the next
+    tick that has a due bucket or a cascade, instead of stepping through
+    every tick.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 1.0,
+        bits: int = 6,
+        levels: int = 4,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.resolution = resolution
+        self.bits = bits
+        self.slots = 1 << bits
+        self.mask = self.slots - 1
+        self.levels = levels
+        self.clock = clock
+
+        self.wheels = [[set() for _ in range(self.slots)] for _ in range(levels)]
+        self.bitmaps = [0] * levels
+        self.current = int(clock() / resolution)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, at: float, callback: Callable[[], None]) -> WheelTimer:
+        """Call `callback()` once `advance` passes the absolute time `at`."""
+        timer = WheelTimer(math.ceil(at / self.resolution), callback)
+        self._place(timer, self.current + 1)
+        self.size += 1
+        return timer
+
+    def cancel(self, timer: WheelTimer):
+        if timer.active:
+            timer.active = False
+            bucket = self.wheels[timer.level][timer.index]
+            bucket.discard(timer)
+            if not bucket:
+                self.bitmaps[timer.level] &= ~(1 << timer.index)
+            self.size -= 1
+
+    def _place(self, timer: WheelTimer, earliest: int):
+        expires = max(timer.expires, earliest)
+        delta = expires - self.current
+        level = 0
+        while level < self.levels - 1 and delta >> (self.bits * (level + 1)):
+            level += 1
+
+        index = (expires >> (self.bits * level)) & self.mask
+        timer.level = level
+        timer.index = index
+        self.wheels[level][index].add(timer)
+        self.bitmaps[level] |= 1 << index
+
+    def _take(self, level: int, index: int) -> set:
+        bucket = self.wheels[level][index]
+        if bucket:
+            self.wheels[level][index] = set()
+            self.bitmaps[level] &= ~(1 << index)
+        return bucket
+
+    def _next_tick(self, target: int) -> int:
+        """The next tick after `current` with something to do, at most
+        `target`."""
+        tick = target
+        bitmap = self.bitmaps[0]
+        if bitmap:
+            start = (self.current + 1) & self.mask
+            rotated = ((bitmap >> start) | (bitmap << (self.slots - start))) & (
+                (1 << self.slots) - 1
+            )
+            tick = min(tick, self.current + 1 + (rotated & -rotated).bit_length() - 1)
+
+        if any(self.bitmaps[1:]):
+            boundary = ((self.current >> self.bits) + 1) << self.bits
+            tick = min(tick, boundary)
+        return tick
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Expire every timer due at `now` (the clock by default) and
+        return how many callbacks ran."""
+        target = int((self.clock() if now is None else now) / self.resolution)
+        fired = 0
+        while self.current < target:
+            if not self.size:
+                self.current = target
+                break
+
+            tick = self._next_tick(target)
+            self.current = tick
+            for level in range(1, self.levels):
+                if tick & ((1 << (self.bits * level)) - 1):
+                    break
+                index = (tick >> (self.bits * level)) & self.mask
+                # the current tick expires right after the cascade
+                for timer in self._take(level, index):
+                    self._place(timer, tick)
+
+            for timer in self._take(0, tick & self.mask):
+                timer.active = False
+                self.size -= 1
+                fired += 1
+                timer.callback()
+        return fired
@@ -0,0 +1,78 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from log import Logger
+
+
+class Watchdog(object):
+    """Opt-in detector for mainloop stalls.
+
+    A cheap `after` callback on the Tk thread stamps a heartbeat every
+    `interval` ms; a daemon thread checks it. When the heartbeat is more
+    than `threshold` ms overdue, the stacks of all threads are captured
+    with `sys._current_frames()` and appended to the rotating "stall" log
+    in `log_dir`, once per stall.
+    """
+
+    def __init__(
+        self, window, log_dir: Path, threshold: int = 500, interval: int = 100
+    ):
+        self.window = window
+        self.log_dir = log_dir
+        self.threshold = threshold / 1000
+        self.interval = interval / 1000
+        self.logger = None
+        self.last_beat = time.monotonic()
+        self.stalled_at = None
+        self.stalls = 0
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = Logger(self.log_dir, "stall")
+        self._beat()
+        thread = threading.Thread(target=self._watch, name="watchdog")
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        """Stop checking, e.g. before the work that follows `mainloop`."""
+        self.stopped.set()
+
+    def _beat(self):
+        self.last_beat = time.monotonic()
+        self.window.after(int(self.interval * 1000), self._beat)
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval / 2):
+            now = time.monotonic()
+            overdue = now - self.last_beat - self.interval
+
+            if overdue > self.threshold:
+                if self.stalled_at is None:
+                    self.stalled_at = self.last_beat + self.interval
+                    self.stalls += 1
+                    self.logger.warning(self.capture(overdue))
+
+            elif self.stalled_at is not None:
+                lasted = self.last_beat - self.stalled_at
+                self.logger.warning(
+                    f"stall #{self.stalls} ended after {lasted * 1000:.0f} ms"
+                )
+                self.stalled_at = None
+
+    def capture(self, overdue: float) -> str:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        lines = [f"stall #{self.stalls}: mainloop {overdue * 1000:.0f} ms overdue"]
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            lines.append(f"--- thread {names.get(ident, ident)} ---")
+            lines.extend(line.rstrip() for line in traceback.format_stack(frame))
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Compare the CPU time the app spends per minute of mouse motion with
+the global mouse hook and with the Tk-native hover mode.
+
+Each mode runs the app in a child process while this process moves the
+pointer with pynput, so the mover's own CPU time is not counted. Needs a
+display.
+
+    python tests/bench_hover.py --duration 30
+"""
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+
+def run_app(mode: str, duration: float):
+    from main import App
+
+    app = App(title="StopWatch", hover_mode=mode, overrideredirect=True)
+    result = {}
+
+    def begin():
+        result["cpu"] = time.process_time()
+        print("ready", flush=True)
+        app.after(int(duration * 1000), end)
+
+    def end():
+        result["cpu"] = time.process_time() - result["cpu"]
+        app.quit()
+
+    app.after(1000, begin)
+    app.mainloop()
+    print(json.dumps({"mode": mode, "cpu": result["cpu"], "duration": duration}))
+
+
+def move_pointer(duration: float, rate: int):
+    from pynput import mouse
+
+    controller = mouse.Controller()
+    cx, cy, radius = 600, 400, 350
+    end = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < end:
+        angle = i / rate * math.pi
+        controller.position = (
+            int(cx + radius * math.cos(angle)),
+            int(cy + radius * math.sin(angle)),
+        )
+        i += 1
+        time.sleep(1 / rate)
+    return i
+
+
+def bench(mode: str, duration: float, rate: int):
+    child = subprocess.Popen(
+        [sys.executable, __file__, "--child", mode, "--duration", str(duration)],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    for line in child.stdout:
+        if line.strip() == "ready":
+            break
+
+    moves = move_pointer(duration, rate)
+    result = json.loads(child.stdout.readline())
+    child.wait()
+
+    cpu_per_minute = result["cpu"] / duration * 60
+    print(
+        f"{mode:>4}: {cpu_per_minute * 1000:8.1f} ms CPU per minute, "
+        f"{moves / duration:.0f} moves/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--rate", type=int, default=200, help="pointer moves per second")
+    parser.add_argument("--child", choices=("hook", "tk"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_app(args.child, args.duration)
+        return
+
+    for mode in ("hook", "tk"):
+        bench(mode, args.duration, args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Throughput and per-call latency of `Logger` against the previous
+implementation, which looked up the logger and re-added its handlers on
+every call and wrote to disk on the calling thread.
+
+Both write to a temporary directory with the console handler silenced,
+the rewrite once per routing mode. "written" counts the lines that
+reached the files; with several Logger instances the previous
+implementation wrote every line once per instance.
+
+    python tests/bench_log.py [--messages 20000] [--instances 2]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from log import SINGLE, SPLIT, Logger
+from tick import LatencyRecorder
+
+
+class LegacyLogger(object):
+    """`core/log.py` before the queue rewrite, trimmed to `info`."""
+
+    def __init__(self, log_dir: Path, log_file_name: str = None):
+        self.log_dir = log_dir
+        self.log_file_name = log_file_name
+        self.formatter = logging.Formatter(
+            fmt="%(asctime)s %(levelname)s>>%(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+        )
+        self.filehandlers = {}
+        self.steamhandler = None
+
+    def create_handler(self, log_level: int):
+        if log_level not in self.filehandlers:
+            name = logging.getLevelName(log_level)
+            if self.log_file_name:
+                name = f"{self.log_file_name} - {name}"
+            filehandler = RotatingFileHandler(
+                self.log_dir / f"{name}.log",
+                encoding="utf-8",
+                maxBytes=5 * 1024 * 1024,
+                backupCount=5,
+            )
+            filehandler.setFormatter(self.formatter)
+            filehandler.setLevel(log_level)
+            self.filehandlers[log_level] = filehandler
+
+        if not self.steamhandler:
+            self.steamhandler = logging.StreamHandler()
+            self.steamhandler.setLevel(logging.CRITICAL + 1)
+
+    def info(self, message):
+        logger = logging.getLogger("info")
+        logger.setLevel(logging.INFO)
+        self.create_handler(logging.INFO)
+        logger.addHandler(self.filehandlers[logging.INFO])
+        logger.addHandler(self.steamhandler)
+        logger.log(logging.INFO, message)
+
+
+def count_lines(log_dir: Path) -> int:
+    lines = 0
+    for path in log_dir.glob("*.log*"):
+        with open(path, "rb") as fp:
+            lines += sum(1 for _ in fp)
+    return lines
+
+
+def bench(name: str, make, messages: int, instances: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp)
+        loggers = [make(log_dir, f"bench{i}") for i in range(instances)]
+        recorder = LatencyRecorder(name)
+        clock = time.perf_counter
+
+        start = clock()
+        for i in range(messages):
+            logger = loggers[i % instances]
+            t = clock()
+            logger.info(f"message {i}")
+            recorder.add(clock() - t)
+        calls = clock() - start
+
+        for logger in loggers:
+            if hasattr(logger, "flush"):
+                logger.flush()
+        drained = clock() - start
+
+        written = count_lines(log_dir)
+        summary = recorder.summary()
+        print(
+            f"{name:>6}: {messages / calls:>10,.0f} msg/s on the caller, "
+            f"{messages / drained:>10,.0f} msg/s to disk, "
+            f"p50={summary['p50'] * 1000:.1f}us p99={summary['p99'] * 1000:.1f}us "
+            f"max={summary['max'] * 1000:.0f}us, written={written}/{messages}"
+        )
+
+        for logger in loggers:
+            for handler in logger.filehandlers.values():
+                handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument(
+        "--instances", type=int, default=2, help="Logger objects sharing the calls"
+    )
+    args = parser.parse_args()
+
+    bench("legacy", LegacyLogger, args.messages, args.instances)
+    for routing in (SPLIT, SINGLE):
+        bench(
+            routing,
+            lambda log_dir, name: Logger(
+                log_dir, name, show_level=logging.CRITICAL + 1, routing=routing
+            ),
+            args.messages,
+            args.instances,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Check `TimerManager` in virtual time and measure how its cost per
+timer grows with the number of timers.
+
+The checks cover batch firing behind a single `after`, periodic
+re-arming on the anchor grid, `cancel_owner`, `cancel_all` and a
+raising callback, which must not stop the other timers. The
+scaling run adds n timers at random deadlines and fires them all; with a
+heap, the cost per timer should grow like log n. The script exits 1 when
+a check fails or the growth is far beyond that.
+
+    python tests/bench_manager.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from manager import TimerManager
+from tick import VirtualClock, VirtualScheduler
+
+
+def make(latency: float = 0.0):
+    clock = VirtualClock()
+    scheduler = VirtualScheduler(clock, latency)
+    return TimerManager(scheduler.after, scheduler.after_cancel, clock), scheduler
+
+
+def check_batch() -> bool:
+    manager, scheduler = make()
+    fired = []
+    for i in range(1000):
+        manager.add(lambda tick, i=i: fired.append(i), 5.0)
+    scheduler.run()
+    return len(fired) == 1000 and scheduler.fired == 1 and not len(manager)
+
+
+def check_periodic() -> bool:
+    manager, scheduler = make(latency=0.004)
+    ticks = []
+    timer = manager.add(ticks.append, 1.0, period=1.0)
+    scheduler.run(until=10.5)
+    manager.cancel(timer)
+    scheduler.run()
+    # late by 4ms each time, still due on the grid of the anchor
+    on_grid = math.isclose(timer.deadline, timer.anchor + 10 * timer.period)
+    return ticks == list(range(10)) and on_grid and not len(manager)
+
+
+def check_owners() -> bool:
+    manager, scheduler = make()
+    fired = {"a": 0, "b": 0}
+    for i in range(100):
+        owner = "a" if i % 2 else "b"
+        manager.add(
+            lambda tick, owner=owner: fired.__setitem__(owner, fired[owner] + 1),
+            1.0 + i / 100,
+            owner=owner,
+        )
+    manager.cancel_owner("a")
+    left = len(manager)
+    scheduler.run()
+    return fired == {"a": 0, "b": 50} and left == 50 and not len(manager)
+
+
+def check_cancel_all() -> bool:
+    manager, scheduler = make()
+    timers = [manager.add(lambda tick: None, 1.0, period=1.0) for _ in range(10)]
+    manager.cancel_all()
+    for timer in timers:
+        manager.cancel(timer)
+    return len(manager) == 0 and scheduler.run() == 0
+
+
+def check_raising() -> bool:
+    manager, scheduler = make()
+    fired = []
+
+    def fail(tick):
+        raise RuntimeError("expected by check_raising")
+
+    manager.add(fail, 1.0)
+    manager.add(fired.append, 1.0)
+    manager.add(fired.append, 2.0, period=1.0)
+    scheduler.run(until=3.5)
+    return fired == [0, 0, 1]
+
+
+def bench(size: int) -> float:
+    random.seed(size)
+    manager, scheduler = make()
+    fired = [0]
+
+    def callback(tick):
+        fired[0] += 1
+
+    start = time.perf_counter()
+    for _ in range(size):
+        manager.add(callback, random.uniform(0, 3600))
+    scheduler.run()
+    elapsed = time.perf_counter() - start
+
+    assert fired[0] == size and not len(manager)
+    per_timer = elapsed / size * 1e6
+    print(f"{size:>9}: {per_timer:6.2f}us per timer ({elapsed:.2f}s)")
+    return per_timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000]
+    )
+    args = parser.parse_args()
+
+    ok = True
+    checks = (check_batch, check_periodic, check_owners, check_cancel_all, check_raising)
+    for check in checks:
+        passed = check()
+        ok &= passed
+        print(f"{check.__name__}: {'ok' if passed else 'FAIL'}")
+
+    sizes = sorted(args.sizes)
+    costs = [bench(size) for size in sizes]
+    # allow log n growth with generous headroom for noise
+    limit = 3 * math.log(sizes[-1]) / math.log(sizes[0])
+    growth = costs[-1] / costs[0]
+    scales = growth <= limit
+    ok &= scales
+    print(f"growth {growth:.2f}x (limit {limit:.2f}x): {'ok' if scales else 'FAIL'}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Check with tracemalloc that the steady-state render path allocates
+nothing, and time it against the f-string formatting it replaced.
+
+    python tests/bench_render.py
+"""
+
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from render import RenderCache
+
+
+def session(cache: RenderCache, total: int):
+    for seconds in range(total, -1, -1):
+        cache.update_text(seconds)
+        count_down = seconds - 1
+        if count_down < 10:
+            cache.update_style("danger" if count_down % 2 else "default")
+
+
+def check_allocations(total: int = 3600) -> int:
+    cache = RenderCache()
+    session(cache, total)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    session(cache, total)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    render_file = str(core_dir / "render.py")
+    stats = after.compare_to(before, "filename")
+    return sum(s.size_diff for s in stats if s.traceback[0].filename == render_file)
+
+
+def main():
+    leaked = check_allocations()
+    print(f"render.py allocations over a 60 minute session: {leaked} bytes")
+
+    cache = RenderCache()
+    session(cache, 3600)
+    cached = timeit.timeit(lambda: session(cache, 3600), number=100)
+    plain = timeit.timeit(
+        lambda: [f"{s // 60:02d}:{s % 60:02d}" for s in range(3600, -1, -1)],
+        number=100,
+    )
+    print(f"cached: {cached / 360100 * 1e9:.0f} ns/tick")
+    print(f"f-string only: {plain / 360100 * 1e9:.0f} ns/tick")
+
+    sys.exit(1 if leaked else 0)
+
+
+if __name__ == "__main__":
+    main()
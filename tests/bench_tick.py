@@ -0,0 +1,206 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Tick accuracy of the real Tk tick chain, idle and under load.
+
+Runs `TickScheduler` (and, with --legacy, the old `after(1000)` re-arming
+chain) on a Tk mainloop, records the lateness of every tick against its
+ideal deadline and prints a histogram, p50/p99/max jitter and the drift
+extrapolated to one hour.
+
+Every invocation runs idle first, then with --load threads of pure
+Python competing for the GIL, then with --cpu threads hashing large
+buffers, which release the GIL and only compete for the cores. The
+summaries are printed side by side at the end. With --max-p99 it exits
+non-zero when the p99 lateness of any run is worse, to be used as a
+regression gate. TickScheduler calibrates its lead like the app does,
+unless --no-calibrate. Needs a display.
+
+    python tests/bench_tick.py --duration 30 --load 4 --cpu 4
+"""
+
+import argparse
+import hashlib
+import sys
+import threading
+import time
+import tkinter
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from dirs import tests_dir
+from tick import LatencyRecorder, TickScheduler
+
+
+def burn(stop: threading.Event):
+    """Pure Python busy loop, competing for the GIL."""
+    n = 0
+    while not stop.is_set():
+        for i in range(10_000):
+            n += i * i
+        n = 0
+
+
+def hash_load(stop: threading.Event):
+    """CPU load outside the GIL: hashlib releases it for large buffers."""
+    data = bytes(1 << 20)
+    while not stop.is_set():
+        hashlib.sha256(data).digest()
+
+
+def run_chain(
+    root: tkinter.Tk, duration: float, period: float, legacy: bool, calibrate: bool
+):
+    """Run one chain for `duration` seconds and return the lateness of each
+    tick in seconds, relative to `anchor + tick * period`."""
+    samples = []
+    clock = time.monotonic
+
+    if legacy:
+        anchor = clock()
+        state = {"tick": 0}
+
+        def legacy_tick():
+            state["tick"] += 1
+            samples.append(clock() - (anchor + state["tick"] * period))
+            state["after_id"] = root.after(int(period * 1000), legacy_tick)
+
+        state["after_id"] = root.after(int(period * 1000), legacy_tick)
+    else:
+        scheduler = TickScheduler(
+            root.after,
+            root.after_cancel,
+            lambda tick: samples.append(clock() - scheduler.deadline(tick)),
+            period=period,
+            calibrate=calibrate,
+        )
+        scheduler.start(immediate=False)
+
+    root.after(int(duration * 1000), root.quit)
+    root.mainloop()
+    # leave nothing firing into the next run
+    if legacy:
+        root.after_cancel(state["after_id"])
+    else:
+        scheduler.cancel()
+    return samples
+
+
+def drift_per_hour(samples, period: float) -> float:
+    """Least-squares slope of lateness over time, in seconds per hour."""
+    n = len(samples)
+    if n < 2:
+        return 0.0
+    xs = [(i + 1) * period for i in range(n)]
+    mean_x = sum(xs) / n
+    mean_y = sum(samples) / n
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, samples))
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    return sxy / sxx * 3600
+
+
+def histogram(samples, width_ms: float = 1.0, bins: int = 20) -> str:
+    counts = [0] * (bins + 1)
+    for s in samples:
+        counts[min(max(int(s * 1000 / width_ms), 0), bins)] += 1
+
+    peak = max(counts) or 1
+    lines = []
+    for i, count in enumerate(counts):
+        if not count:
+            continue
+        label = f">={bins * width_ms:g}" if i == bins else f"{i * width_ms:g}"
+        bar = "#" * max(1, count * 40 // peak)
+        lines.append(f"  {label:>6} ms | {bar} {count}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per run")
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument(
+        "--load", type=int, default=4, help="pure Python threads holding the GIL"
+    )
+    parser.add_argument(
+        "--cpu", type=int, default=4, help="hashing threads releasing the GIL"
+    )
+    parser.add_argument(
+        "--legacy", action="store_true", help="also run the after(1000) chain"
+    )
+    parser.add_argument(
+        "--no-calibrate",
+        dest="calibrate",
+        action="store_false",
+        help="measure TickScheduler without the lead calibration the app uses",
+    )
+    parser.add_argument(
+        "--max-p99", type=float, metavar="MS", help="fail above this p99 lateness"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help=f"append the summary to {tests_dir}"
+    )
+    args = parser.parse_args()
+
+    root = tkinter.Tk()
+    root.withdraw()
+
+    loads = [("idle", None, 0)]
+    if args.load:
+        loads.append((f"gil x{args.load}", burn, args.load))
+    if args.cpu:
+        loads.append((f"cpu x{args.cpu}", hash_load, args.cpu))
+
+    chains = [False, True] if args.legacy else [False]
+    failed = False
+    report = []
+    for load, target, threads in loads:
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=target, args=(stop,), daemon=True)
+            for _ in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+
+        for legacy in chains:
+            name = "after(1000) chain" if legacy else "TickScheduler"
+            samples = run_chain(
+                root, args.duration, args.period, legacy, args.calibrate
+            )
+            recorder = LatencyRecorder(f"{load:>8} {name}")
+            for s in samples:
+                recorder.add(s)
+
+            summary = recorder.summary()
+            drift = drift_per_hour(samples, args.period)
+            report.append(f"{recorder.report()}, drift={drift * 1000:.1f}ms/h")
+            print(report[-1])
+            print(histogram(samples))
+
+            if not legacy and args.max_p99 is not None:
+                failed = failed or summary.get("p99", 0) > args.max_p99
+
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    root.destroy()
+
+    print()
+    for line in report:
+        print(line)
+
+    if args.save:
+        tests_dir.mkdir(parents=True, exist_ok=True)
+        with open(tests_dir / "bench_tick.log", "a", encoding="utf-8") as fp:
+            fp.write(time.strftime("%Y-%m-%d %H:%M:%S ") + " | ".join(report) + "\n")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
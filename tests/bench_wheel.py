@@ -0,0 +1,65 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Insert, cancel and expire throughput of the timing wheel.
+
+    python tests/bench_wheel.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from tick import TimingWheel
+
+
+def bench(size: int, horizon: float = 12 * 3600):
+    random.seed(size)
+    times = [random.uniform(1, horizon) for _ in range(size)]
+    fired = [0]
+
+    def callback():
+        fired[0] += 1
+
+    wheel = TimingWheel(clock=lambda: 0.0)
+    start = time.perf_counter()
+    timers = [wheel.add(at, callback) for at in times]
+    insert = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for timer in timers[::2]:
+        wheel.cancel(timer)
+    cancel = time.perf_counter() - start
+
+    # advance once per second of a 12 hour day
+    start = time.perf_counter()
+    for now in range(1, int(horizon) + 2):
+        wheel.advance(now)
+    expire = time.perf_counter() - start
+
+    assert fired[0] == size - len(timers[::2]) and not len(wheel)
+    print(
+        f"{size:>9}: insert {size / insert:>12,.0f}/s  "
+        f"cancel {len(timers[::2]) / cancel:>12,.0f}/s  "
+        f"expire {fired[0] / expire:>12,.0f}/s "
+        f"({expire:.2f}s for {int(horizon)} advances)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
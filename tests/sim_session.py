@@ -0,0 +1,83 @@
+#!/usr/bin/env/python3
+# -*- coding:utf-8 -*-
+
+"""Run complete sessions of the real App in virtual time and check the
+tick count, the last-10-seconds style flips and the beeps. A 60 minute
+countdown takes well under a second. Needs a display for the window.
+
+    python tests/sim_session.py [--minutes 60] [--latency 0.02]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parents[1]
+core_dir = root_dir / "core"
+sys.path.append(str(core_dir))
+
+from engine import READY
+from main import App
+from tick import VirtualClock, VirtualScheduler
+
+
+def expected(total: int, countdown: bool):
+    """Renders, styles and beeps of a session of `total` seconds straight
+    from the rules: every second is shown once, the last ten count-down
+    seconds flip the style and beep, and the reset shows the ready time
+    in the default style again."""
+    values = list(range(total, -1, -1)) if countdown else list(range(total + 1))
+    alerts = [total - tick - 1 for tick in range(total + 1) if total - tick - 1 < 10]
+    styles = ["danger" if count_down % 2 else "default" for count_down in alerts]
+    return values + [total], styles + ["default"], alerts
+
+
+def simulate(app: App, scheduler: VirtualScheduler, minutes: int, countdown: bool):
+    app.time_number_var.set(minutes)
+    app.count_down_var.set(countdown)
+    app.play_sound_var.set(True)
+
+    renders, styles, beeps = [], [], []
+    app.render_text = renders.append
+    app.render_style = styles.append
+    app.beep = beeps.append
+
+    app.start()
+    scheduler.run()
+
+    want = expected(minutes * 60, countdown)
+    ok = (renders, styles, beeps) == want and app.engine.state == READY
+    flips = sum(a != b for a, b in zip(styles, styles[1:]))
+    mode = "countdown" if countdown else "count-up"
+    print(
+        f"{mode:>9} {minutes} min: renders={len(renders)} style flips={flips} "
+        f"beeps={len(beeps)} virtual={scheduler.clock.now:.0f}s "
+        f"late_max={app.tick_scheduler.max_error * 1000:.1f}ms {'ok' if ok else 'FAIL'}"
+    )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="virtual lateness of every after"
+    )
+    args = parser.parse_args()
+
+    ok = True
+    for countdown in (True, False):
+        clock = VirtualClock()
+        scheduler = VirtualScheduler(clock, args.latency)
+        app = App(title="StopWatch", hover_mode="tk", clock=clock, scheduler=scheduler)
+        start = time.perf_counter()
+        ok &= simulate(app, scheduler, args.minutes, countdown)
+        print(f"          real time: {(time.perf_counter() - start) * 1000:.0f} ms")
+        app.destroy()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()